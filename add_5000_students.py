@@ -6,9 +6,7 @@ Script to populate the database with users and 5000+ students
 This script generates sample data for testing and demonstration purposes
 """
 
-# Import os module for file path operations
-import os
-# Import sys module for system-level operations and path manipulation
+# Import sys module for setting the script's exit code
 import sys
 # Import random module for generating random data
 import random
@@ -16,11 +14,8 @@ import random
 from datetime import datetime
 # Import password hashing function from Werkzeug security library
 from werkzeug.security import generate_password_hash
-
-# Add current directory to Python path so we can import our modules
-# os.path.dirname gets the directory containing this script
-# os.path.abspath gets the absolute path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Import select for building lightweight column-only queries
+from sqlalchemy import select
 
 # Import database instance and model classes from our application
 from core.models import db, Student, User
@@ -71,21 +66,30 @@ courses_list = [
     "Data Science", "Web Development", "Machine Learning", "Cybersecurity", "Database Systems"
 ]
 
+# Pair every name with its lowercase form once, so emails can be built
+# without calling .lower() for every generated student
+first_name_pairs = [(name, name.lower()) for name in first_names]
+last_name_pairs = [(name, name.lower()) for name in last_names]
+
+# Every possible grade from 60.0 to 100.0 in steps of 0.1
+# Built once so all of a student's grades can be drawn with a single random.choices() call
+grade_values = [value / 10 for value in range(600, 1001)]
+
 # Function to generate random student data for a given index number
 def generate_student_data(index):
     """Generate random student data"""
     # Create roll number with STU prefix and 5-digit zero-padded index
     # Example: index 1 becomes "STU00001", index 100 becomes "STU00100"
     roll_no = f"STU{index:05d}"
-    # Randomly select a first name from the list
-    first_name = random.choice(first_names)
-    # Randomly select a last name from the list
-    last_name = random.choice(last_names)
+    # Randomly select a first name (and its lowercase form) from the list
+    first_name, first_lower = random.choice(first_name_pairs)
+    # Randomly select a last name (and its lowercase form) from the list
+    last_name, last_lower = random.choice(last_name_pairs)
     # Combine first and last name to create full name
     name = f"{first_name} {last_name}"
     # Generate email address using lowercase name and index
     # Example: "john.smith123@university.edu"
-    email = f"{first_name.lower()}.{last_name.lower()}{index}@university.edu"
+    email = f"{first_lower}.{last_lower}{index}@university.edu"
     
     # Randomly determine number of courses for this student (between 3 and 6)
     num_courses = random.randint(3, 6)
@@ -94,9 +98,9 @@ def generate_student_data(index):
     courses = random.sample(courses_list, num_courses)
     
     # Generate random grades for each course
-    # Each grade is a random float between 60 and 100, rounded to 1 decimal place
-    # List comprehension creates a grade for each course
-    grades = [round(random.uniform(60, 100), 1) for _ in range(num_courses)]
+    # Each grade is a random value between 60.0 and 100.0 with 1 decimal place
+    # random.choices draws all grades in one call instead of one uniform() + round() per course
+    grades = random.choices(grade_values, k=num_courses)
     
     # Return dictionary containing all student data
     return {
@@ -170,14 +174,22 @@ def add_users():
         }
     ]
     
+    # Find which sample emails already exist using a single query
+    # instead of running one SELECT per user inside the loop
+    sample_emails = [user_data['email'] for user_data in sample_users]
+    existing_emails = set(
+        db.session.execute(select(User.email).where(User.email.in_(sample_emails))).scalars()
+    )
+    
     # Counter to track how many new users were added
     added_count = 0
+    # Collect per-user status lines and print them together after the loop
+    messages = []
     # Loop through each user dictionary in the sample_users list
     for user_data in sample_users:
-        # Check if a user with this email already exists in database
-        existing_user = User.query.filter_by(email=user_data['email']).first()
         # Only add user if they don't already exist (avoid duplicates)
-        if not existing_user:
+        # Passwords are only hashed for users that will actually be inserted
+        if user_data['email'] not in existing_emails:
             # Create a new User object with all the user data
             user = User(
                 email=user_data['email'],  # Set email
@@ -194,12 +206,14 @@ def add_users():
             db.session.add(user)
             # Increment counter
             added_count += 1
-            # Print success message with checkmark emoji
-            print(f"✅ Added user: {user_data['email']} ({user_data['role']})")
+            # Record success message with checkmark emoji
+            messages.append(f"✅ Added user: {user_data['email']} ({user_data['role']})")
         # If user already exists
         else:
-            # Print warning message with warning emoji
-            print(f"⚠️  User already exists: {user_data['email']}")
+            # Record warning message with warning emoji
+            messages.append(f"⚠️  User already exists: {user_data['email']}")
+    # Print all status lines with a single write to stdout
+    print("\n".join(messages))
     
     # Try to save all users to database
     try:
@@ -231,50 +245,79 @@ def add_students(num_students=5000, batch_size=100):
     # Counter to track total number of students added
     total_added = 0
     
-    # Loop through students in batches (0 to num_students, incrementing by batch_size)
-    # This prevents memory issues by processing students in smaller groups
-    for batch_start in range(0, num_students, batch_size):
-        # Calculate where this batch ends (don't exceed total number)
-        # min() ensures we don't go past the last student
-        batch_end = min(batch_start + batch_size, num_students)
-        # Create empty list to store this batch of students
-        batch_students = []
-        
-        # Loop through each student number in this batch
-        for i in range(batch_start, batch_end):
-            # Generate random data for this student (i+1 because roll numbers start at 1)
-            student_data = generate_student_data(i + 1)
-            # Create a Student object from the generated data
-            student = Student(
-                roll_no=student_data['roll_no'],  # Set roll number
-                name=student_data['name'],  # Set name
-                email=student_data['email'],  # Set email
-                courses=student_data['courses'],  # Set courses list
-                grades=student_data['grades']  # Set grades list
-            )
-            # Add this student to the current batch list
-            batch_students.append(student)
+    # Load roll numbers that already exist so a re-run skips them instead of failing
+    # on the unique constraint. scalars() yields plain strings straight from the cursor
+    # into the set, without building ORM objects or Row tuples
+    existing_roll_nos = set(db.session.execute(select(Student.roll_no)).scalars())
+    # Collect per-batch progress lines and print them together once everything is saved
+    progress_lines = []
+    
+    # Secondary indexes (like the one on name) would be updated on every insert,
+    # so drop them for a fresh load; they are rebuilt in one pass below
+    # The unique roll_no constraint stays in place because re-runs rely on it
+    secondary_indexes = list(Student.__table__.indexes) if not existing_roll_nos else []
+    
+    # Try to save all batches to the database in a single transaction
+    # Committing once at the end means one disk sync instead of one per batch,
+    # and a failure rolls back the whole run instead of leaving it half done
+    try:
+        # On a fresh load, drop these indexes first and rebuild each one in a single pass afterwards
+        # Building an index over sorted data is cheaper than updating it row by row
+        for index in secondary_indexes:
+            index.drop(db.session.connection(), checkfirst=True)
         
-        # Try to save this batch to the database
-        try:
-            # Bulk save all students in this batch (faster than one-by-one)
-            db.session.bulk_save_objects(batch_students)
-            # Commit the transaction to save to database
-            db.session.commit()
+        # Loop through students in batches (0 to num_students, incrementing by batch_size)
+        # This prevents memory issues by processing students in smaller groups
+        for batch_start in range(0, num_students, batch_size):
+            # Calculate where this batch ends (don't exceed total number)
+            # min() ensures we don't go past the last student
+            batch_end = min(batch_start + batch_size, num_students)
+            # Generate random data for each student in this batch
+            # Plain dictionaries are inserted directly, no Student objects needed
+            # (i+1 because roll numbers start at 1)
+            batch_students = [generate_student_data(i + 1) for i in range(batch_start, batch_end)]
+            # Leave out students whose roll number is already in the database
+            batch_students = [student_data for student_data in batch_students
+                              if student_data['roll_no'] not in existing_roll_nos]
+            # Insert the whole batch with a single multi-row INSERT (skip empty batches)
+            if batch_students:
+                Student.bulk_insert(batch_students)
             # Update total count with students from this batch
             total_added += len(batch_students)
-            # Print progress update showing batch number and progress
+            # Record progress update showing batch number and progress
             # batch_start//batch_size + 1 gives current batch number
             # (num_students-1)//batch_size + 1 gives total batches
-            print(f"✅ Added batch {batch_start//batch_size + 1}/{(num_students-1)//batch_size + 1} - Total students: {total_added}")
-        # If saving batch fails
-        except Exception as e:
-            # Rollback the transaction to undo partial changes
+            progress_lines.append(f"✅ Added batch {batch_start//batch_size + 1}/{(num_students-1)//batch_size + 1} - Total students: {total_added}")
+        # Recreate the dropped indexes now that all rows are in the table
+        for index in secondary_indexes:
+            index.create(db.session.connection())
+        # Commit the transaction once to save every batch to the database
+        db.session.commit()
+        # Print all progress lines with a single write, now that the batches are saved
+        print("\n".join(progress_lines))
+    # If saving any batch fails
+    except Exception as e:
+        # Rollback the transaction to undo all batches from this run
+        db.session.rollback()
+        # Print error message
+        print(f"❌ Error adding batch: {e}")
+        # SQLite's Python driver commits DROP INDEX on its own, so the rollback
+        # does not bring the dropped indexes back; recreate any that are missing
+        try:
+            for index in secondary_indexes:
+                index.create(db.session.connection(), checkfirst=True)
+            # Save the recreated indexes
+            db.session.commit()
+        # If the indexes can't be recreated (e.g. the database is locked)
+        except Exception as index_error:
+            # Undo the partial index work
             db.session.rollback()
-            # Print error message
-            print(f"❌ Error adding batch: {e}")
-            # Return False to indicate failure
-            return False
+            # Warn which indexes are still missing and need to be rebuilt
+            index_names = ', '.join(index.name for index in secondary_indexes)
+            print(f"⚠️  Could not recreate {index_names}: {index_error}")
+            print(f"⚠️  {index_names} must be rebuilt (starting the app adds missing indexes back)")
+        # Return False to indicate failure
+        return False
     
     # Print final summary header
     print(f"\n{'='*60}")  # Print separator
@@ -282,10 +325,10 @@ def add_students(num_students=5000, batch_size=100):
     print(f"{'='*60}\n")  # Print separator
     
     # Query database to show final statistics
-    # Get all students from database
-    all_students = Student.query.all()
+    # Count students with SELECT COUNT(*) instead of loading every row
+    total_in_db = Student.query.count()
     # Print total count in database (may include previously existing students)
-    print(f"Total students in database: {len(all_students)}")
+    print(f"Total students in database: {total_in_db}")
     
     # Return True to indicate success
     return True
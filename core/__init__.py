@@ -0,0 +1,2 @@
+# Core package for the Student Records application
+# Holds the Flask app (app.py) and the database models (models.py)
@@ -3,21 +3,32 @@ import os
 # Import secrets module for generating secure random keys
 import secrets
 # Import Flask components for web application functionality
-from flask import Flask, render_template, request, redirect, url_for, flash, Response, session
-# Import SQLAlchemy for database ORM (Object Relational Mapping)
-from flask_sqlalchemy import SQLAlchemy
+from flask import Flask, render_template, request, redirect, url_for, flash, Response, stream_with_context
 # Import Flask-Login components for user authentication and session management
-from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-# Import Werkzeug security functions for password hashing and verification
-from werkzeug.security import generate_password_hash, check_password_hash
-# Import email validation library to validate email format
-from email_validator import validate_email, EmailNotValidError
+from flask_login import LoginManager, login_user, logout_user, login_required
+# Import Werkzeug security function for password verification
+from werkzeug.security import check_password_hash
 # Import database instance and model classes from our models module
 from core.models import db, Student, User
-# Import SQLAlchemy text and or_ for raw SQL queries and OR conditions
-from sqlalchemy import text, or_
+# Import SQLAlchemy text and or_ for raw SQL queries and OR conditions,
+# and event to run setup code whenever a new database connection is opened
+from sqlalchemy import text, or_, event
+# Import load_only to fetch only the columns a page needs
+from sqlalchemy.orm import load_only
+# Import IntegrityError to detect unique constraint violations (duplicate roll numbers)
+from sqlalchemy.exc import IntegrityError
 # Import json module for handling JSON data export
 import json
+# Import heapq for picking the top N items without sorting the whole list
+import heapq
+# Import defaultdict so new dictionary entries are created on first access
+from collections import defaultdict
+# Import itemgetter for fast C-level dictionary key lookups in sort keys
+from operator import itemgetter
+# Import re module for matching forbidden SQL keywords in custom queries
+import re
+# Import bisect_right for looking up which letter grade a number falls into
+from bisect import bisect_right
 
 # Create Flask application instance
 # __name__ helps Flask find resources like templates
@@ -40,11 +51,42 @@ if not app.secret_key:
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///students.db'
 # Disable modification tracking to save memory and improve performance
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Configure the database connection pool
+# Connections are reused between requests instead of reopened every time
+# pool_size is how many connections stay open, max_overflow is how many extra
+# connections may be opened during bursts of concurrent requests
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': 10,  # Connections kept open for reuse
+    'max_overflow': 20  # Extra connections allowed under heavy load
+}
 
 # Initialize the database with our Flask app
 # This connects the db instance from models.py to this Flask application
 db.init_app(app)
 
+
+# SQLite connection setup function
+# This function is called every time a new database connection is opened
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply SQLite performance settings to a new connection"""
+    # Create a cursor on the raw SQLite connection
+    cursor = dbapi_connection.cursor()
+    # Write-ahead logging lets readers keep working while a write is in progress
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # In WAL mode, NORMAL syncs to disk at checkpoints instead of on every commit
+    # Trade-off: a power cut or OS crash can lose the most recent commits,
+    # but the database file stays consistent (an app crash alone loses nothing)
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    # Keep temporary tables and sort indexes in memory instead of temp files
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    # Close the cursor
+    cursor.close()
+
+# Register the setup function on the engine before any connection is made
+# An application context is needed to access db.engine
+with app.app_context():
+    event.listen(db.engine, 'connect', set_sqlite_pragmas)
+
 # Initialize Flask-Login extension for handling user authentication
 login_manager = LoginManager()
 # Connect the login manager to our Flask app
@@ -65,6 +107,10 @@ def init_db():
     with app.app_context():
         # Create all tables defined in models.py (User, Student, etc.)
         db.create_all()
+        # create_all() only builds indexes together with new tables,
+        # so add any index that is missing from an existing database
+        for index in Student.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
 
 # Initialize database on application startup
 # Try to create tables when the application starts
@@ -83,9 +129,11 @@ except Exception as e:
 @login_manager.user_loader
 def load_user(user_id):
     """Load user from database by ID"""
-    # Query the User table to find user by ID and return the User object
+    # Look up the user by primary key and return the User object
+    # db.session.get checks the session's identity map first and only
+    # queries the database if this user isn't already loaded
     # Convert user_id to integer as it's stored as string in session
-    return User.query.get(int(user_id))
+    return db.session.get(User, int(user_id))
 
 # --- Login route ---
 # Define route for login page that accepts both GET and POST requests
@@ -150,21 +198,29 @@ def index():
     # Calculate statistics to display on dashboard
     # Count total number of students
     total_students = len(students_data)
-    # Create empty lists to collect all courses and grades
-    all_courses = []
-    all_grades = []
+    # Collect unique courses and grade totals in a single pass
+    # instead of building flat lists of every course and grade first
+    unique_courses = set()
+    grade_total = 0
+    grade_count = 0
     # Loop through each student to gather their courses and grades
     for student in students_data:
-        # Add all of this student's courses to the list
-        all_courses.extend(student['courses'])
-        # Add all of this student's grades to the list
-        all_grades.extend(student['grades'])
+        # Add this student's courses to the set (duplicates are ignored)
+        unique_courses.update(student['courses'])
+        # Total and count this student's grades once
+        student_total = sum(student['grades'])
+        student_count = len(student['grades'])
+        # Store the student's average so the template doesn't recalculate it per row
+        student['avg_grade'] = student_total / student_count if student_count else 0
+        # Add this student's grades to the running total and count
+        grade_total += student_total
+        grade_count += student_count
     
-    # Count unique courses (using set to remove duplicates)
-    total_courses = len(set(all_courses))
+    # Count unique courses
+    total_courses = len(unique_courses)
     # Calculate average grade across all students
     # Use conditional to avoid division by zero if no grades exist
-    avg_grade = sum(all_grades) / len(all_grades) if all_grades else 0
+    avg_grade = grade_total / grade_count if grade_count else 0
     
     # Create a dictionary with all statistics
     stats = {
@@ -220,16 +276,9 @@ def add_student():
             # Return to add student page with error
             return render_template('add_student.html')
         
-        # Check if a student with this roll number already exists
-        existing_student = Student.query.filter_by(roll_no=roll_no).first()
-        # If roll number is already in use
-        if existing_student:
-            # Show error message (roll numbers must be unique)
-            flash('Roll number already exists', 'error')
-            # Return to add student page with error
-            return render_template('add_student.html')
-        
         # Try to add the student to the database
+        # roll_no has a unique constraint, so a duplicate is rejected by the insert
+        # itself and no separate existence query is needed beforehand
         try:
             # Create a new Student object
             student = Student()
@@ -251,6 +300,14 @@ def add_student():
             flash('Student added successfully!', 'success')
             # Redirect to main page to see the new student
             return redirect(url_for('index'))
+        # If roll number is already in use (unique constraint violated)
+        except IntegrityError:
+            # Rollback the failed insert
+            db.session.rollback()
+            # Show error message (roll numbers must be unique)
+            flash('Roll number already exists', 'error')
+            # Return to add student page with error
+            return render_template('add_student.html')
         # If database operation fails
         except Exception as e:
             # Rollback the transaction to undo any partial changes
@@ -371,6 +428,14 @@ def delete_student(roll_no):
     # Redirect back to main page
     return redirect(url_for('index'))
 
+# Pattern matching dangerous SQL keywords that could modify data
+# Compiled once at startup instead of on every submitted query
+# \b only matches whole words, so column names like created_at are still allowed
+# re.IGNORECASE makes the check case-insensitive without upper-casing the query
+FORBIDDEN_QUERY_KEYWORDS = re.compile(
+    r'\b(?:DROP|DELETE|UPDATE|INSERT|ALTER|CREATE|TRUNCATE)\b', re.IGNORECASE
+)
+
 # Define route for custom SQL query interface
 # Decorator requires user to be logged in to access this route
 @app.route('/query', methods=['GET', 'POST'])
@@ -388,22 +453,28 @@ def query():
         if query_text:
             # Try to execute the query with security checks
             try:
-                # List of dangerous SQL keywords that could modify data
-                forbidden_keywords = ['DROP', 'DELETE', 'UPDATE', 'INSERT', 'ALTER', 'CREATE', 'TRUNCATE']
-                # Check if query contains any forbidden keywords (case-insensitive)
-                if any(keyword in query_text.upper() for keyword in forbidden_keywords):
-                    # Show error if query tries to modify data
-                    flash('Only SELECT queries are allowed', 'error')
+                # Checks run cheapest first: the length check is instant, so oversized
+                # queries are rejected before any text is scanned
                 # Check if query is too long (prevent denial of service)
-                elif len(query_text) > 1000:
+                if len(query_text) > 1000:
                     # Show error if query exceeds character limit
                     flash('Query too long (max 1000 characters)', 'error')
+                # Check if query contains any forbidden keywords (case-insensitive)
+                elif FORBIDDEN_QUERY_KEYWORDS.search(query_text):
+                    # Show error if query tries to modify data
+                    flash('Only SELECT queries are allowed', 'error')
                 # Check if query starts with SELECT (safe read-only operation)
-                elif query_text.upper().startswith('SELECT'):
+                # Only the first 6 characters are upper-cased instead of the whole query
+                elif query_text[:6].upper() == 'SELECT':
                     # Execute the raw SQL query using SQLAlchemy's text function
                     result = db.session.execute(text(query_text))
                     # Convert result rows to list of lists for template rendering
-                    results = [list(row) for row in result.fetchall()]
+                    # Fetch at most 101 rows (one extra tells us the result was cut off)
+                    # This limits how many rows are copied into Python; queries with
+                    # ORDER BY, GROUP BY, DISTINCT or aggregates are still fully computed by SQLite
+                    results = [list(row) for row in result.fetchmany(101)]
+                    # Close the result so the unread rows are not fetched
+                    result.close()
                     # Check if results exceed display limit
                     if len(results) > 100:
                         # Limit to first 100 results to prevent overwhelming the page
@@ -427,6 +498,11 @@ def query():
     return render_template('query.html', results=results or [])
 
 
+# Lowest grade needed for each letter grade above F (60+ is D, 70+ is C, 80+ is B, 90+ is A)
+LETTER_GRADE_CUTOFFS = [60, 70, 80, 90]
+# Letter grades in the same order, starting with F for anything below the first cutoff
+LETTER_GRADES = ['F', 'D', 'C', 'B', 'A']
+
 # Define route for generating statistical reports
 # Decorator requires user to be logged in to access this route
 @app.route('/reports')
@@ -436,12 +512,13 @@ def reports():
     # Try to generate reports (wrap in try/except for error handling)
     try:
         # Query all students from database
-        students = Student.query.all()
-        # Convert student objects to dictionaries
-        students_data = [student.to_dict() for student in students]
+        # load_only fetches just the columns the report uses (email and created_at are skipped)
+        students = Student.query.options(
+            load_only(Student.name, Student.roll_no, Student.courses, Student.grades)
+        ).all()
         
         # Count total number of students
-        total_students = len(students_data)
+        total_students = len(students)
         
         # Check if there are any students in the database
         if total_students == 0:
@@ -452,116 +529,86 @@ def reports():
         
         # Initialize dictionaries for course statistics and grade distribution
         # course_stats will track students and grades per course
-        course_stats = {}
+        # defaultdict creates a course's entry the first time the course is seen
+        course_stats = defaultdict(lambda: {'total_students': 0, 'total_grade': 0, 'avg_grade': 0})
         # grade_distribution counts how many A's, B's, C's, D's, F's
         grade_distribution = {'A': 0, 'B': 0, 'C': 0, 'D': 0, 'F': 0}
+        # Running totals for the overall average, kept in the same loop
+        # so we don't need a second pass over every student's grades
+        grand_total = 0
+        grade_count = 0
         
         # Loop through each student to calculate statistics
-        for student_data in students_data:
+        # Read the columns directly instead of building a dictionary per student first
+        for student in students:
             # Get list of courses for this student
-            courses = student_data['courses']
+            courses = student.courses
             # Get list of grades for this student
-            grades = student_data['grades']
+            grades = student.grades
             
             # Zip courses and grades together to process each pair
             for course, grade in zip(courses, grades):
-                # Check if we've seen this course before
-                if course not in course_stats:
-                    # Initialize statistics for this course
-                    course_stats[course] = {'total_students': 0, 'total_grade': 0, 'avg_grade': 0}
-                
+                # Look up this course's statistics once (created automatically if new)
+                stats = course_stats[course]
                 # Increment student count for this course
-                course_stats[course]['total_students'] += 1
+                stats['total_students'] += 1
                 # Add this grade to the total for averaging
-                course_stats[course]['total_grade'] += grade
+                stats['total_grade'] += grade
+                # Add this grade to the running totals for the overall average
+                grand_total += grade
+                grade_count += 1
                 
                 # Categorize grade into letter grade distribution
-                # 90+ is A
-                if grade >= 90:
-                    grade_distribution['A'] += 1
-                # 80-89 is B
-                elif grade >= 80:
-                    grade_distribution['B'] += 1
-                # 70-79 is C
-                elif grade >= 70:
-                    grade_distribution['C'] += 1
-                # 60-69 is D
-                elif grade >= 60:
-                    grade_distribution['D'] += 1
-                # Below 60 is F
-                else:
-                    grade_distribution['F'] += 1
+                # bisect_right counts how many cutoffs the grade has reached,
+                # which is the position of its letter in LETTER_GRADES
+                grade_distribution[LETTER_GRADES[bisect_right(LETTER_GRADE_CUTOFFS, grade)]] += 1
         
         # Calculate average grades for each course
-        # Loop through all courses we found
-        for course in course_stats:
+        # Loop through the statistics of all courses we found
+        for stats in course_stats.values():
             # Check if course has students (avoid division by zero)
-            if course_stats[course]['total_students'] > 0:
+            if stats['total_students'] > 0:
                 # Calculate average: total grades / number of students
                 # Round to 2 decimal places
-                course_stats[course]['avg_grade'] = round(
-                    course_stats[course]['total_grade'] / course_stats[course]['total_students'], 2
-                )
+                stats['avg_grade'] = round(stats['total_grade'] / stats['total_students'], 2)
         
         # Find top performing students
-        # Create empty list to store top performers
-        top_performers = []
-        # Loop through all students
-        for student in students:
-            # Calculate this student's average grade
-            avg_grade = student.get_average_grade()
-            # Add student info to list
-            top_performers.append({
+        # Build a summary (name, roll number, average, courses) for every student
+        # A list comprehension avoids a Python-level append() call per student
+        student_summaries = [
+            {
                 'name': student.name,  # Student's name
                 'roll_no': student.roll_no,  # Student's roll number
-                'avg_grade': avg_grade,  # Student's average grade
+                'avg_grade': student.get_average_grade(),  # Student's average grade
                 'courses': student.courses  # List of student's courses
-            })
+            }
+            for student in students
+        ]
         
-        # Sort students by average grade in descending order (highest first)
-        top_performers.sort(key=lambda x: x['avg_grade'], reverse=True)
-        # Keep only top 5 students
-        top_performers = top_performers[:5]
+        # Keep only the top 5 students by average grade (highest first)
+        # heapq.nlargest only tracks 5 items instead of sorting every student
+        top_performers = heapq.nlargest(5, student_summaries, key=itemgetter('avg_grade'))
         
         # Find low performing students who may need attention
         # Students with average below 70 are considered low performers
-        low_performers = []
-        # Loop through all students
-        for student in students:
-            # Calculate this student's average grade
-            avg_grade = student.get_average_grade()
-            # Check if average is below 70 (threshold for concern)
-            if avg_grade < 70:
-                # Add student info to low performers list
-                low_performers.append({
-                    'name': student.name,  # Student's name
-                    'roll_no': student.roll_no,  # Student's roll number
-                    'avg_grade': avg_grade,  # Student's average grade
-                    'courses': student.courses  # List of student's courses
-                })
+        # Reuses the summaries above so each average is only calculated once
+        low_performers = [summary for summary in student_summaries if summary['avg_grade'] < 70]
         
-        # Sort low performers by grade (lowest first)
-        low_performers.sort(key=lambda x: x['avg_grade'])
-        # Keep only bottom 10 students
-        low_performers = low_performers[:10]
+        # Keep only the bottom 10 students by average grade (lowest first)
+        # heapq.nsmallest only tracks 10 items instead of sorting every low performer
+        low_performers = heapq.nsmallest(10, low_performers, key=itemgetter('avg_grade'))
         
         # Calculate overall average across all students and courses
-        # Create empty list to collect all grades
-        all_grades = []
-        # Loop through all students
-        for student_data in students_data:
-            # Add all of this student's grades to the list
-            all_grades.extend(student_data['grades'])
-        # Calculate overall average (sum all grades / count)
+        # Uses the running totals collected in the statistics loop above
         # Use conditional to avoid division by zero
-        overall_avg = round(sum(all_grades) / len(all_grades), 2) if all_grades else 0
+        overall_avg = round(grand_total / grade_count, 2) if grade_count else 0
         
         # Package all report data into a dictionary
         report_data = {
             'total_students': total_students,  # Total number of students
             'total_courses': len(course_stats),  # Total number of unique courses
             'overall_avg': overall_avg,  # Overall average grade
-            'course_stats': course_stats,  # Per-course statistics
+            'course_stats': dict(course_stats),  # Per-course statistics
             'grade_distribution': grade_distribution,  # Distribution of letter grades
             'top_performers': top_performers,  # Top 5 students
             'low_performers': low_performers  # Bottom 10 students (below 70)
@@ -591,20 +638,27 @@ def search():
     
     # Only search if a search term was provided
     if search_term:
-        # Use SQLAlchemy ORM to search for students
-        # ilike() performs case-insensitive search (LIKE in SQL)
+        # Build the LIKE pattern once
         # % wildcards match any characters before/after search term
+        pattern = f'%{search_term}%'
+        # Use SQLAlchemy ORM to search for students
+        # SQLite's LIKE is already case-insensitive, so like() is used instead of
+        # ilike(), which would wrap every column in lower() for every row scanned
         # or_() allows matching any of the fields (name OR roll_no OR email)
         students = Student.query.filter(
             or_(
-                Student.name.ilike(f'%{search_term}%'),  # Search in name
-                Student.roll_no.ilike(f'%{search_term}%'),  # Search in roll number
-                Student.email.ilike(f'%{search_term}%')  # Search in email
+                Student.name.like(pattern),  # Search in name
+                Student.roll_no.like(pattern),  # Search in roll number
+                Student.email.like(pattern)  # Search in email
             )
         ).all()  # Execute query and get all matching results
         
         # Convert student objects to dictionaries for template
         students_data = [student.to_dict() for student in students]
+        # Store each student's average grade for the template (same formula as index())
+        for student in students_data:
+            grades = student['grades']
+            student['avg_grade'] = sum(grades) / len(grades) if grades else 0
     
     # Render index template with search results
     # Pass search term to show what was searched
@@ -617,19 +671,30 @@ def search():
 @login_required
 def export():
     """Export students data as JSON"""
-    # Query all students from database
-    students = Student.query.all()
-    # Convert all student objects to dictionaries
-    students_data = [student.to_dict() for student in students]
-    
-    # Create JSON string from student data
-    # indent=2 makes the JSON readable with 2-space indentation
-    # default=str converts non-JSON types (like datetime) to strings
-    json_data = json.dumps(students_data, indent=2, default=str)
+    # Generator that writes the JSON array one student at a time
+    # so the whole export never has to be held in memory as one string
+    def generate():
+        # Opening bracket of the JSON array
+        yield '['
+        # Separator written before each student (none before the first)
+        separator = '\n'
+        # Fetch students from the database in chunks of 500 rows
+        for student in Student.query.yield_per(500):
+            # Create JSON text for this student
+            # indent=2 makes the JSON readable with 2-space indentation
+            # default=str converts non-JSON types (like datetime) to strings
+            student_json = json.dumps(student.to_dict(), indent=2, default=str)
+            # Indent every line once more so it nests inside the array
+            yield separator + '  ' + student_json.replace('\n', '\n  ')
+            # Students after the first are separated by a comma
+            separator = ',\n'
+        # Closing bracket (on its own line only when the array has items)
+        yield ']' if separator == '\n' else '\n]'
     
     # Return JSON data as downloadable file
+    # stream_with_context keeps the app context (and database session) open while streaming
     return Response(
-        json_data,  # The JSON content to send
+        stream_with_context(generate()),  # The JSON content to send, produced piece by piece
         mimetype='application/json',  # Tell browser this is JSON
         headers={'Content-Disposition': 'attachment; filename=students_export.json'}  # Force download with filename
     )
@@ -6,6 +6,8 @@ from datetime import datetime
 from flask_login import UserMixin
 # Import Enum for creating enumerated constant values for user roles
 from enum import Enum
+# Import insert to build multi-row INSERT statements for bulk loading
+from sqlalchemy import insert
 
 # Create a SQLAlchemy database instance that will be used across the application
 db = SQLAlchemy()
@@ -85,7 +87,8 @@ class Student(db.Model):
     roll_no = db.Column(db.String(50), unique=True, nullable=False)
     
     # Name: student's full name (required field)
-    name = db.Column(db.String(100), nullable=False)
+    # Indexed because the dashboard lists students ordered by name
+    name = db.Column(db.String(100), nullable=False, index=True)
     
     # Email: student's email address (required field)
     email = db.Column(db.String(100), nullable=False)
@@ -114,16 +117,28 @@ class Student(db.Model):
             'name': self.name,  # Student's name
             'email': self.email,  # Student's email
             'courses': self.courses,  # List of enrolled courses
-            'grades': [float(grade) for grade in self.grades],  # Convert all grades to float
+            'grades': self.grades,  # List of grades (already floats, parsed from the form or generated)
             'created_at': self.created_at.isoformat() if self.created_at else None  # Convert datetime to ISO string
         }
     
     # Calculate and return the average grade for this student
     # Used in reports and student performance analysis
     def get_average_grade(self):
+        # Read the grades list once
+        grades = self.grades
         # Check if student has any grades recorded
-        if self.grades:
+        if grades:
             # Calculate average: sum all grades and divide by count, round to 2 decimal places
-            return round(sum(float(grade) for grade in self.grades) / len(self.grades), 2)
+            # Grades are stored as floats, so no per-grade conversion is needed
+            return round(sum(grades) / len(grades), 2)
         # Return 0.0 if no grades exist
         return 0.0
+    
+    # Insert many students at once from a list of dictionaries
+    # Used by bulk imports so rows go out as one executemany INSERT
+    # instead of building and flushing one ORM object per student
+    @classmethod
+    def bulk_insert(cls, rows):
+        # Execute a single INSERT for all rows in the current transaction
+        # The caller is responsible for committing
+        db.session.execute(insert(cls), rows)